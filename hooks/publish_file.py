@@ -8,15 +8,33 @@
 # agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
 # not expressly granted therein are reserved by Shotgun Software Inc.
 
+import errno
 import os
 import pprint
-import traceback
+import shutil
+from multiprocessing.pool import ThreadPool
 
 import sgtk
 from sgtk.util.filesystem import copy_file, ensure_folder_exists
+from tank_vendor import six
 
 HookBaseClass = sgtk.get_hook_baseclass()
 
+# files with these extensions are hard linked to the publish location when
+# possible, unless the "Allow Hardlink" setting is explicitly set
+LINK_FILE_EXTENSIONS = (".exr", ".png", ".jpg")
+
+# linux ioctl request to clone a file's extents, see ioctl_ficlone(2)
+FICLONE = 0x40049409
+
+# errors reported by FICLONE when the filesystem can not clone files at all
+CLONE_UNSUPPORTED_ERRNOS = (
+    errno.EOPNOTSUPP,
+    errno.ENOTTY,
+    errno.EINVAL,
+    errno.EXDEV,
+)
+
 
 class BasicFilePublishPlugin(HookBaseClass):
     """
@@ -54,8 +72,9 @@ class BasicFilePublishPlugin(HookBaseClass):
     :meth:`Item.properties` or :meth:`Item.local_properties`.
 
         publish_template - If set, used to determine where "path" should be
-            copied prior to publishing. If not specified, "path" will be
-            published in place.
+            copied prior to publishing. Can be a template object or the name
+            of a template defined in the pipeline configuration. If not
+            specified, "path" will be published in place.
 
         publish_type - If set, will be supplied to SG as the publish type when
             registering "path" as a new publish. If not set, will be determined
@@ -113,6 +132,40 @@ class BasicFilePublishPlugin(HookBaseClass):
     method in your plugin subclass.
     """
 
+    # maximum number of entries kept by each of the plugin's caches
+    CACHE_SIZE = 1024
+
+    def __init__(self, *args, **kwargs):
+        """
+        Initialize the plugin and the caches it keeps while resolving publish
+        information. See :meth:`reset_caches`.
+        """
+
+        super(BasicFilePublishPlugin, self).__init__(*args, **kwargs)
+
+        # (copy of the "File Types" value, {extension: publish type}) for the
+        # last value indexed
+        self._file_type_index = None
+
+        # (path, is sequence) -> publish name from the path info hook
+        self._publish_name_cache = {}
+
+        # (path, id of work template, id of publish template) ->
+        #     (work template, publish template, publish path)
+        self._publish_path_cache = {}
+
+        # template name -> template, or None if not defined
+        self._template_cache = {}
+
+        # path -> version number from the path info hook
+        self._version_number_cache = {}
+
+        # (id of work template, path) -> (work template, fields or None)
+        self._work_fields_cache = {}
+
+        # devices whose filesystem does not support cloning files
+        self._unclonable_devices = set()
+
     ############################################################################
     # standard publish plugin properties
 
@@ -217,6 +270,25 @@ class BasicFilePublishPlugin(HookBaseClass):
                     "extensions that should be associated."
                 ),
             },
+            "Allow Hardlink": {
+                "type": "bool",
+                "default": None,
+                "description": (
+                    "If True, work files on the same device as their publish "
+                    "location are hard linked rather than copied. If False, "
+                    "work files are never linked, for published files which "
+                    "must not share an inode with the work file. If not set, "
+                    "only .exr, .png and .jpg files are linked."
+                ),
+            },
+            "Copy Concurrency": {
+                "type": "int",
+                "default": 4,
+                "description": (
+                    "The maximum number of files of a sequence to copy to the "
+                    "publish location in parallel."
+                ),
+            },
         }
 
     @property
@@ -489,7 +561,13 @@ class BasicFilePublishPlugin(HookBaseClass):
             None if no template could be identified.
         """
 
-        return item.get_property("publish_template")
+        publish_template = item.get_property("publish_template")
+
+        # the property may hold a template name, which keeps it serializable
+        if isinstance(publish_template, six.string_types):
+            publish_template = self._get_template_by_name(publish_template)
+
+        return publish_template
 
     def get_publish_type(self, settings, item):
         """
@@ -507,29 +585,26 @@ class BasicFilePublishPlugin(HookBaseClass):
             return publish_type
 
         # fall back to the path info hook logic
-        publisher = self.parent
         path = item.get_property("path")
         if path is None:
             raise AttributeError("'PublishData' object has no attribute 'path'")
 
-        # get the publish path components
-        path_info = publisher.util.get_file_path_components(path)
-
-        # determine the publish type
-        extension = path_info["extension"]
+        # determine the publish type. only the extension of the path is
+        # needed, so skip building the full path components.
+        extension = self._get_path_extension(path)
 
         # ensure lowercase and no dot
         if extension:
             extension = extension.lstrip(".").lower()
 
-            for type_def in settings["File Types"].value:
-
-                publish_type = type_def[0]
-                file_extensions = type_def[1:]
-
-                if extension in file_extensions:
-                    # found a matching type in settings. use it!
-                    return publish_type
+        # the resolved type only depends on the configured file types and the
+        # extension. look it up in the flattened index of the file types,
+        # which also remembers the fallbacks resolved below.
+        type_index = self._get_file_type_index(settings["File Types"].value)
+        publish_type = type_index.get(extension)
+        if publish_type:
+            # found a matching type in settings. use it!
+            return publish_type
 
         # --- no pre-defined publish type found...
 
@@ -540,6 +615,7 @@ class BasicFilePublishPlugin(HookBaseClass):
             # no extension, assume it is a folder
             publish_type = "Folder"
 
+        type_index[extension] = publish_type
         return publish_type
 
     def get_publish_path(self, settings, item):
@@ -561,7 +637,9 @@ class BasicFilePublishPlugin(HookBaseClass):
         if publish_path:
             return publish_path
 
-        # fall back to template/path logic
+        # fall back to template/path logic. Bind the logger locally as it is
+        # used throughout this method, which runs for every item and phase.
+        logger = self.logger
         path = item.get_property("path")
         if path is None:
             raise AttributeError("'PublishData' object has no attribute 'path'")
@@ -575,35 +653,52 @@ class BasicFilePublishPlugin(HookBaseClass):
         # We need both work and publish template to be defined for template
         # support to be enabled.
         if work_template and publish_template:
-            if work_template.validate(path):
-                work_fields = work_template.get_fields(path)
+
+            # the path resolved from the templates only depends on the path
+            # and the templates themselves. It is requested in several publish
+            # phases, so return the one resolved previously if any. The
+            # templates are kept alongside the path so that their ids can not
+            # be recycled while the entry is alive.
+            cache_key = (path, id(work_template), id(publish_template))
+            cached = self._publish_path_cache.get(cache_key)
+            if cached and cached[0] is work_template and cached[1] is publish_template:
+                return cached[2]
+
+            fields = self._get_work_fields(work_template, path)
+            if fields is not None:
+                work_fields = fields
             else:
-                self.logger.warning(
+                logger.warning(
                     "Could not validate work_template property, check if it is configured correctly."
                 )
 
             missing_keys = publish_template.missing_keys(work_fields)
 
             if missing_keys:
-                self.logger.warning(
+                logger.warning(
                     "Not enough keys to apply work fields (%s) to "
-                    "publish template (%s)" % (work_fields, publish_template)
+                    "publish template (%s)",
+                    work_fields,
+                    publish_template,
                 )
             else:
                 publish_path = publish_template.apply_fields(work_fields)
-                self.logger.debug(
-                    "Used publish template to determine the publish path: %s"
-                    % (publish_path,)
+                logger.debug(
+                    "Used publish template to determine the publish path: %s",
+                    publish_path,
+                )
+                self._cache_value(
+                    self._publish_path_cache,
+                    cache_key,
+                    (work_template, publish_template, publish_path),
                 )
         else:
-            self.logger.debug("publish_template: %s" % publish_template)
-            self.logger.debug("work_template: %s" % work_template)
+            logger.debug("publish_template: %s", publish_template)
+            logger.debug("work_template: %s", work_template)
 
         if not publish_path:
             publish_path = path
-            self.logger.debug(
-                "Could not validate a publish template. Publishing in place."
-            )
+            logger.debug("Could not validate a publish template. Publishing in place.")
 
         return publish_path
 
@@ -634,9 +729,9 @@ class BasicFilePublishPlugin(HookBaseClass):
         publish_version = None
 
         if work_template:
-            if work_template.validate(path):
+            work_fields = self._get_work_fields(work_template, path)
+            if work_fields is not None:
                 self.logger.debug("Work file template configured and matches file.")
-                work_fields = work_template.get_fields(path)
 
         if work_fields:
             # if version number is one of the fields, use it to populate the
@@ -647,7 +742,17 @@ class BasicFilePublishPlugin(HookBaseClass):
 
         else:
             self.logger.debug("Using path info hook to determine publish version.")
-            publish_version = publisher.util.get_version_number(path)
+
+            # the path info hook result only depends on the path. cache it
+            # since the version is requested in several publish phases.
+            if path in self._version_number_cache:
+                publish_version = self._version_number_cache[path]
+            else:
+                publish_version = self._cache_value(
+                    self._version_number_cache,
+                    path,
+                    publisher.util.get_version_number(path),
+                )
             if publish_version is None:
                 publish_version = 1
 
@@ -682,7 +787,17 @@ class BasicFilePublishPlugin(HookBaseClass):
             name_path = path
             is_sequence = False
 
-        return publisher.util.get_publish_name(name_path, sequence=is_sequence)
+        # the path info hook result only depends on its arguments. cache it
+        # since the name is requested in several publish phases.
+        cache_key = (name_path, is_sequence)
+        if cache_key in self._publish_name_cache:
+            return self._publish_name_cache[cache_key]
+
+        return self._cache_value(
+            self._publish_name_cache,
+            cache_key,
+            publisher.util.get_publish_name(name_path, sequence=is_sequence),
+        )
 
     def get_publish_dependencies(self, settings, item):
         """
@@ -759,6 +874,24 @@ class BasicFilePublishPlugin(HookBaseClass):
         """
         return item.get_property("publish_kwargs", default_value={})
 
+    def reset_caches(self):
+        """
+        Clear the values this plugin caches while resolving publish
+        information.
+
+        The publish manager calls this method whenever a new publish session
+        is collected or loaded, since the configuration or the files on disk
+        may have changed in the meantime.
+        """
+
+        self._file_type_index = None
+        self._publish_name_cache.clear()
+        self._publish_path_cache.clear()
+        self._template_cache.clear()
+        self._version_number_cache.clear()
+        self._work_fields_cache.clear()
+        self._unclonable_devices.clear()
+
     ############################################################################
     # protected methods
 
@@ -785,10 +918,14 @@ class BasicFilePublishPlugin(HookBaseClass):
 
         """
 
+        # bound locally as they are used for every file of a sequence
+        logger = self.logger
+        get_work_fields = self._get_work_fields
+
         # ---- ensure templates are available
         work_template = item.properties.get("work_template")
         if not work_template:
-            self.logger.debug(
+            logger.debug(
                 "No work template set on the item. "
                 "Skipping copy file to publish location."
             )
@@ -796,7 +933,7 @@ class BasicFilePublishPlugin(HookBaseClass):
 
         publish_template = self.get_publish_template(settings, item)
         if not publish_template:
-            self.logger.debug(
+            logger.debug(
                 "No publish template set on the item. "
                 "Skipping copying file to publish location."
             )
@@ -811,64 +948,427 @@ class BasicFilePublishPlugin(HookBaseClass):
         if "sequence_paths" in item.properties:
             work_files = item.properties.get("sequence_paths", [])
             if not work_files:
-                self.logger.warning(
+                logger.warning(
                     "Sequence publish without a list of files. Publishing "
-                    "the sequence path in place: %s" % (item.get_property("path"),)
+                    "the sequence path in place: %s",
+                    item.get_property("path"),
                 )
                 return
 
-        # ---- copy the work files to the publish location
+        allow_hardlink = settings.get("Allow Hardlink")
+        allow_hardlink = allow_hardlink.value if allow_hardlink else None
+
+        concurrency = settings.get("Copy Concurrency")
+        concurrency = concurrency.value if concurrency else 1
+
+        # ---- resolve the publish location of each work file
 
+        # the missing keys only depend on the names of the fields, which are
+        # typically the same for every file of a sequence. check each
+        # distinct set of names once.
+        missing_keys_by_names = {}
+
+        file_pairs = []
         for work_file in work_files:
 
-            if not work_template.validate(work_file):
-                self.logger.warning(
+            work_fields = get_work_fields(work_template, work_file)
+            if work_fields is None:
+                logger.warning(
                     "Work file '%s' did not match work template '%s'. "
-                    "Publishing in place." % (work_file, work_template)
+                    "Publishing in place.",
+                    work_file,
+                    work_template,
                 )
                 return
 
-            work_fields = work_template.get_fields(work_file)
-
-            missing_keys = publish_template.missing_keys(work_fields)
+            field_names = frozenset(work_fields)
+            if field_names not in missing_keys_by_names:
+                missing_keys_by_names[field_names] = publish_template.missing_keys(
+                    work_fields
+                )
+            missing_keys = missing_keys_by_names[field_names]
 
             if missing_keys:
-                self.logger.warning(
+                logger.warning(
                     "Work file '%s' missing keys required for the publish "
-                    "template: %s" % (work_file, missing_keys)
+                    "template: %s",
+                    work_file,
+                    missing_keys,
                 )
                 return
 
             publish_file = publish_template.apply_fields(work_fields)
 
-            # copy the file
+            # nothing to copy if the work file already is the publish file,
+            # e.g. through a link or a differently spelled path
+            if self._is_same_file(work_file, publish_file):
+                logger.debug(
+                    "Work file '%s' is already the publish file '%s'. "
+                    "Skipping copy.",
+                    work_file,
+                    publish_file,
+                )
+                continue
+
+            file_pairs.append((work_file, publish_file))
+
+        # folders are created up front, on this thread, since creating them
+        # temporarily changes the process wide umask. files of a sequence
+        # usually share a folder, only ensure it exists once.
+        ensured_folders = set()
+        for work_file, publish_file in file_pairs:
+            publish_folder = os.path.dirname(publish_file)
+            if publish_folder in ensured_folders:
+                continue
             try:
-                publish_folder = os.path.dirname(publish_file)
                 ensure_folder_exists(publish_folder)
+            except Exception as e:
+                six.raise_from(
+                    Exception(
+                        "Failed to copy work file from '%s' to '%s': %s"
+                        % (work_file, publish_file, e)
+                    ),
+                    e,
+                )
+            ensured_folders.add(publish_folder)
+
+        # ---- copy the work files to the publish location
+
+        def copy_work_file(file_pair):
+            return self._copy_work_file(
+                file_pair[0], file_pair[1], allow_hardlink=allow_hardlink
+            )
+
+        if concurrency > 1 and len(file_pairs) > 1:
+            # copies are i/o bound and release the GIL, overlap them. The
+            # first error, if any, is re-raised once all copies are done.
+            # files are handed out one at a time, a failure would otherwise
+            # skip the remaining files of the chunk it belongs to.
+            pool = ThreadPool(min(concurrency, len(file_pairs)))
+            try:
+                transfers = pool.map(copy_work_file, file_pairs, chunksize=1)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            transfers = [copy_work_file(file_pair) for file_pair in file_pairs]
+
+        # log from this thread only, the publish log handlers drive the UI
+        for (work_file, publish_file), transfer in zip(file_pairs, transfers):
+            logger.debug(
+                "%s work file '%s' to publish file '%s'.",
+                transfer,
+                work_file,
+                publish_file,
+            )
+
+    def _copy_work_file(self, work_file, publish_file, allow_hardlink=None):
+        """
+        Copy a single work file to its publish location.
+
+        This method may be called from worker threads by
+        :meth:`_copy_work_to_publish` and therefore must not log.
+
+        :param str work_file: The path of the work file to copy.
+        :param str publish_file: The path to copy the work file to. The
+            parent folder must already exist.
+        :param bool allow_hardlink: If ``True``, the publish file may be a hard
+            link to the work file. If ``None``, only files with one of the
+            :data:`LINK_FILE_EXTENSIONS` may be linked.
+
+        :return: A string describing how the file was transferred, as returned
+            by :meth:`_copy_file`.
+        """
+
+        # image sequences are linked when possible unless configured
+        # otherwise. For Nuke, this only works on Windows on Nuke 13+ because
+        # of Python 3
+        if allow_hardlink is None:
+            link_file = work_file.endswith(LINK_FILE_EXTENSIONS)
+        else:
+            link_file = allow_hardlink
+
+        try:
+            return self._copy_file(work_file, publish_file, allow_hardlink=link_file)
+        except Exception as e:
+            six.raise_from(
+                Exception(
+                    "Failed to copy work file from '%s' to '%s': %s"
+                    % (work_file, publish_file, e)
+                ),
+                e,
+            )
+
+    def _copy_file(self, src, dst, allow_hardlink=False):
+        """
+        Copy the supplied source file to the destination path.
+
+        When the source and destination live on the same device, the file is
+        hard linked if ``allow_hardlink`` is ``True``, otherwise a copy on
+        write clone is attempted on filesystems supporting it. Both are
+        metadata only operations, regardless of the file size.
+
+        Real copies mirror :meth:`sgtk.util.filesystem.copy_file` but copy the
+        contents via :func:`shutil.copyfile`, which lets python use the
+        platform's in-kernel copy routines when available and skips the
+        intermediate mode copy since the permissions are reset afterwards
+        anyway. Falls back to ``copy_file`` if the fast path fails.
+
+        :param str src: The path of the file to copy.
+        :param str dst: The path to copy the file to.
+        :param bool allow_hardlink: If ``True``, the destination may be a hard
+            link sharing the source's inode.
+
+        :return: A string describing how the file was transferred, one of
+            ``"Linked"``, ``"Cloned"`` or ``"Copied"``.
+        """
+
+        try:
+            device = os.stat(src).st_dev
+            same_device = device == os.stat(os.path.dirname(dst)).st_dev
+        except OSError:
+            same_device = False
+
+        if same_device:
+            if allow_hardlink:
+                try:
+                    os.link(src, dst)
+                    return "Linked"
+                except (AttributeError, OSError):
+                    # os.link is not available on windows with python 2, the
+                    # destination exists or the filesystem does not support it
+                    pass
+
+            if self._clone_file(src, dst, device):
+                return "Cloned"
+
+        try:
+            shutil.copyfile(src, dst)
+        except (IOError, OSError):
+            copy_file(src, dst)
+        else:
+            # only the contents are retried by the fallback, a failure to set
+            # the permissions is not worth copying the file a second time
+            os.chmod(dst, 0o666)
+
+        return "Copied"
+
+    def _clone_file(self, src, dst, device):
+        """
+        Attempt to clone the supplied source file to a new destination path
+        via a copy on write reflink (``FICLONE``).
+
+        Only supported on linux filesystems such as btrfs or xfs. The clone is
+        only attempted if the destination does not exist yet, to never
+        truncate a file that may share its inode with the source. Once the
+        filesystem of a device reports it can not clone files, no further
+        attempt is made for that device.
+
+        :param str src: The path of the file to clone.
+        :param str dst: The path to clone the file to.
+        :param int device: The device both files live on.
+
+        :return: ``True`` if the file was cloned, ``False`` otherwise.
+        """
+
+        if (
+            not sgtk.util.is_linux()
+            or device in self._unclonable_devices
+            or os.path.exists(dst)
+        ):
+            return False
+
+        import fcntl
+
+        try:
+            with open(src, "rb") as src_file:
+                with open(dst, "wb") as dst_file:
+                    fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+        except (IOError, OSError) as e:
+            if e.errno in CLONE_UNSUPPORTED_ERRNOS:
+                self._unclonable_devices.add(device)
+
+            # clean up the empty destination so the copy starts from scratch
+            if os.path.exists(dst):
+                os.remove(dst)
+            return False
+
+        os.chmod(dst, 0o666)
+        return True
+
+    def _cache_value(self, cache, key, value):
+        """
+        Store a value in one of the plugin's caches and return it.
+
+        The plugin lives across publish sessions and long sequences resolve
+        many paths, so a cache holding :attr:`CACHE_SIZE` entries is cleared
+        before storing a new one rather than growing unbounded.
+
+        :param dict cache: The cache to store the value in.
+        :param key: The key to store the value under.
+        :param value: The value to store.
 
-                linkFileExtensions = ('.exr', '.png', '.jpg')
-
-                if work_file.endswith(linkFileExtensions):
-                    # For Nuke, this only works on Windows on Nuke 13+ because of Python 3
-                    try:
-                        os.link(work_file, publish_file)
-                        self.logger.debug("Linked files.")
-                    except:
-                        copy_file(work_file, publish_file)
-                        self.logger.debug("Copied files.")
-                else:
-                    copy_file(work_file, publish_file)
-            except Exception:
-                raise Exception(
-                    "Failed to copy work file from '%s' to '%s'.\n%s"
-                    % (work_file, publish_file, traceback.format_exc())
+        :return: The stored value.
+        """
+
+        if len(cache) >= self.CACHE_SIZE:
+            cache.clear()
+
+        cache[key] = value
+        return value
+
+    def _get_file_type_index(self, file_types):
+        """
+        Return a dictionary mapping file extensions to publish types for the
+        supplied "File Types" setting value.
+
+        The index of the last file types list is kept and reused as long as
+        the setting value is equal, so that resolving the publish type of an
+        item is a single dictionary lookup. Settings are copied for each task,
+        the value is therefore compared by content rather than identity. As
+        with the linear scan it replaces, the first type listing an extension
+        wins.
+
+        The structure of the setting is validated while building the index so
+        that a misconfiguration is reported up front rather than silently
+        falling back to extension based publish types.
+
+        :param list file_types: The value of the "File Types" setting.
+
+        :return: A dictionary of extension to publish type.
+        :raises TankError: If the setting is not a list of lists of strings.
+        """
+
+        if self._file_type_index and self._file_type_index[0] == file_types:
+            return self._file_type_index[1]
+
+        type_index = {}
+        for type_def in file_types:
+            if (
+                not isinstance(type_def, (list, tuple))
+                or len(type_def) < 2
+                or not all(isinstance(v, six.string_types) for v in type_def)
+            ):
+                raise sgtk.TankError(
+                    "Invalid 'File Types' entry: %s. Each entry must be a list "
+                    "of a publish type followed by one or more file "
+                    "extensions." % (type_def,)
                 )
 
-            self.logger.debug(
-                "Copied work file '%s' to publish file '%s'."
-                % (work_file, publish_file)
+            publish_type = type_def[0]
+            for extension in type_def[1:]:
+                type_index.setdefault(extension, publish_type)
+
+        # keep a copy, the setting value could be modified in place later on
+        self._file_type_index = ([list(t) for t in file_types], type_index)
+        return type_index
+
+    def _is_same_file(self, path, other_path):
+        """
+        Return whether the two supplied paths point to the same file on disk.
+
+        Unlike a string comparison, this detects paths resolving to the same
+        file through links, a case insensitive filesystem or different
+        spellings of the same path.
+
+        :param str path: The path of an existing file.
+        :param str other_path: The path to compare with.
+
+        :return: ``True`` if both paths are the same file, ``False`` otherwise.
+        """
+
+        if not os.path.exists(other_path):
+            return False
+
+        try:
+            return os.path.samefile(path, other_path)
+        except (AttributeError, OSError):
+            # os.path.samefile is not available on windows with python 2
+            return os.path.normcase(os.path.normpath(path)) == os.path.normcase(
+                os.path.normpath(other_path)
+            )
+
+    def _get_path_extension(self, path):
+        """
+        Return the extension of the supplied path.
+
+        This is a lightweight equivalent of the ``extension`` returned by
+        :meth:`~.util.get_file_path_components`, for callers that don't need
+        the other path components.
+
+        :param str path: The path to get the extension of.
+
+        :return: The extension without the leading dot, or ``None`` if the path
+            is a folder or has no extension.
+        """
+
+        if os.path.isdir(path):
+            return None
+
+        (_, extension) = os.path.splitext(path.rstrip("/\\"))
+        return extension.lstrip(".") if extension else None
+
+    def _get_template_by_name(self, template_name):
+        """
+        Return the template defined in the pipeline configuration for the
+        supplied name.
+
+        Names are resolved once and cached, and a missing template is only
+        reported the first time it is requested rather than for every item.
+
+        :param str template_name: The name of the template to resolve.
+
+        :return: The template or ``None`` if not defined in the configuration.
+        """
+
+        if template_name in self._template_cache:
+            return self._template_cache[template_name]
+
+        template = self.sgtk.templates.get(template_name)
+        if template is None:
+            self.logger.warning(
+                "Template '%s' is not defined in the pipeline configuration.",
+                template_name,
             )
 
+        return self._cache_value(self._template_cache, template_name, template)
+
+    def _get_work_fields(self, work_template, path):
+        """
+        Return the fields extracted from the supplied path by the work
+        template.
+
+        Validating a path and extracting its fields runs the template's
+        regular expressions, and is done for the same path by several methods
+        across the publish phases. The result is cached per template and path.
+
+        :param work_template: The work template to extract the fields with.
+        :param str path: The path to extract the fields from.
+
+        :return: A new dictionary of fields, or ``None`` if the path does not
+            match the work template.
+        """
+
+        cache_key = (id(work_template), path)
+        cached = self._work_fields_cache.get(cache_key)
+        if cached and cached[0] is work_template:
+            work_fields = cached[1]
+        else:
+            work_fields = None
+            if work_template.validate(path):
+                work_fields = work_template.get_fields(path)
+
+            # the template is kept alongside the fields so that its id can
+            # not be recycled while the entry is alive.
+            self._cache_value(
+                self._work_fields_cache, cache_key, (work_template, work_fields)
+            )
+
+        # callers are free to modify the fields they get back
+        if work_fields is None:
+            return None
+        return dict(work_fields)
+
     def _get_next_version_info(self, path, item):
         """
         Return the next version of the supplied path.
@@ -899,8 +1399,7 @@ class BasicFilePublishPlugin(HookBaseClass):
         work_fields = None
 
         if work_template:
-            if work_template.validate(path):
-                work_fields = work_template.get_fields(path)
+            work_fields = self._get_work_fields(work_template, path)
 
         # if we have template and fields, use them to determine the version info
         if work_fields and "version" in work_fields:
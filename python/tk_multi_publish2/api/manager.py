@@ -171,6 +171,9 @@ class PublishManager(object):
         # this will clear the tree of all non-persistent items.
         self.tree.clear(clear_persistent=False)
 
+        # values cached by the plugins may be stale for the new session
+        self._reset_plugin_caches()
+
         # get a list of all items in the tree prior to collection (this should
         # be only the persistent items)
         items_before = list(self.tree)
@@ -200,6 +203,7 @@ class PublishManager(object):
         supplied file.
         """
         self._tree = PublishTree.load_file(path)
+        self._reset_plugin_caches()
 
     def save(self, path):
         """
@@ -581,6 +585,14 @@ class PublishManager(object):
 
         return plugins
 
+    def _reset_plugin_caches(self):
+        """
+        Clears the values cached by all the loaded publish plugins.
+        """
+        for plugins in self._processed_contexts.values():
+            for plugin in plugins:
+                plugin.run_reset_caches()
+
     def _path_already_collected(self, file_path):
         """
         Returns ``True`` if the supplied file path has been collected into the
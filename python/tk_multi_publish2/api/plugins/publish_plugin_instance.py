@@ -213,6 +213,15 @@ class PublishPluginInstance(PluginInstanceBase):
         with self._handle_plugin_error("Finalize complete!", "Error finalizing: %s"):
             self._hook_instance.finalize(settings, item)
 
+    def run_reset_caches(self):
+        """
+        Clears the values cached by the plugin hook, for hooks caching values
+        across publish sessions.
+        """
+        reset_caches = getattr(self._hook_instance, "reset_caches", None)
+        if reset_caches:
+            reset_caches()
+
     ############################################################################
     # ui methods
 
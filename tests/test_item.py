@@ -388,6 +388,25 @@ class TestPublishItem(PublishApiTestBase):
             # Validate with our custom yielder. Each task that fails reports an error.
             self.assertEqual(len(new_manager.validate(task_yielder(new_manager))), 6)
 
+    def test_collect_session_resets_plugin_caches(self):
+        """
+        Ensures the publish plugins are asked to clear their caches when a new
+        session is collected.
+        """
+        manager = self._create_manager()
+        plugins = manager._load_publish_plugins(self.app.context)
+        self.assertNotEqual(len(plugins), 0)
+
+        with patch.object(
+            type(plugins[0]), "run_reset_caches", autospec=True
+        ) as run_reset_caches:
+            manager.collect_session()
+
+        self.assertEqual(
+            sorted(id(call[0][0]) for call in run_reset_caches.call_args_list),
+            sorted(id(plugin) for plugin in plugins),
+        )
+
     def _create_manager(self):
         """
         Creates a new PublishManager.
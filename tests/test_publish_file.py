@@ -0,0 +1,582 @@
+# Copyright (c) 2018 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import copy
+import errno
+import os
+import re
+import shutil
+import stat
+import tempfile
+import threading
+import unittest
+
+from publish_api_test_base import PublishApiTestBase
+from tank_test.tank_test_base import setUpModule  # noqa
+from mock import patch, MagicMock, PropertyMock
+
+import sgtk
+
+
+class FrameTemplate(object):
+    """
+    Minimal stand-in for a toolkit template resolving frame numbered files
+    inside a folder, e.g. ``<folder>/<prefix>.0001.dat``.
+    """
+
+    def __init__(self, folder, prefix):
+        self._folder = folder
+        self._prefix = prefix
+        self._regex = re.compile(
+            r"^%s\.(\d{4})\.dat$" % re.escape(os.path.join(folder, prefix))
+        )
+
+    def validate(self, path):
+        return self._regex.match(path) is not None
+
+    def get_fields(self, path):
+        return {"frame": int(self._regex.match(path).group(1))}
+
+    def missing_keys(self, fields):
+        return [key for key in ["frame"] if key not in fields]
+
+    def apply_fields(self, fields):
+        return os.path.join(
+            self._folder, "%s.%04d.dat" % (self._prefix, fields["frame"])
+        )
+
+
+class TestPublishFilePlugin(PublishApiTestBase):
+    def setUp(self):
+        super(TestPublishFilePlugin, self).setUp()
+
+        self.hook = self.app.create_hook_instance(
+            "{self}/publish_file.py", base_class=self.app.base_hooks.PublishPlugin
+        )
+        # local properties are looked up by the id of the executing plugin.
+        self.hook.id = "publish_file"
+
+        self.settings = {}
+        for name, schema in self.hook.settings.items():
+            self.settings[name] = self.api.PluginSetting(
+                name, schema["type"], schema["default"]
+            )
+
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+        self.work_folder = os.path.join(self.root, "work")
+        self.publish_folder = os.path.join(self.root, "publish")
+        os.makedirs(self.work_folder)
+
+        self.work_template = FrameTemplate(self.work_folder, "render")
+        self.publish_template = FrameTemplate(self.publish_folder, "render_v001")
+
+    def _create_sequence_item(self, nb_frames):
+        """
+        Creates work files for a sequence and an item to publish them.
+        """
+        sequence_paths = []
+        for frame in range(1, nb_frames + 1):
+            path = self.work_template.apply_fields({"frame": frame})
+            with open(path, "w") as f:
+                f.write("frame %d" % frame)
+            sequence_paths.append(path)
+
+        item = self.PublishItem("render", "file.image.sequence", "Sequence")
+        item.properties.path = os.path.join(self.work_folder, "render.%04d.dat")
+        item.properties.sequence_paths = sequence_paths
+        item.properties.work_template = self.work_template
+        item.properties.publish_template = self.publish_template
+        return item
+
+    def _create_work_file(self, frame):
+        """
+        Creates a work file and the publish folder to copy it to.
+        """
+        work_file = self.work_template.apply_fields({"frame": frame})
+        with open(work_file, "w") as f:
+            f.write("frame %d" % frame)
+        if not os.path.exists(self.publish_folder):
+            os.makedirs(self.publish_folder)
+        return work_file
+
+    def _create_file_item(self, frame):
+        """
+        Creates a work file and an item to publish it.
+        """
+        item = self.PublishItem("render", "file.image", "Image")
+        item.properties.path = self._create_work_file(frame)
+        item.properties.work_template = self.work_template
+        item.properties.publish_template = self.publish_template
+        return item
+
+    def _get_publish_file(self, frame):
+        return self.publish_template.apply_fields({"frame": frame})
+
+    def test_copy_sequence_in_parallel(self):
+        """
+        Ensures every file of a sequence is copied to its publish location,
+        using worker threads when the copy concurrency allows it.
+        """
+        item = self._create_sequence_item(8)
+        self.settings["Copy Concurrency"].value = 4
+
+        copy_threads = set()
+        copy_file = self.hook._copy_file
+
+        def record_copy(*args, **kwargs):
+            copy_threads.add(threading.current_thread().name)
+            return copy_file(*args, **kwargs)
+
+        with patch.object(self.hook, "_copy_file", side_effect=record_copy):
+            self.hook._copy_work_to_publish(self.settings, item)
+
+        for frame in range(1, 9):
+            with open(self._get_publish_file(frame)) as f:
+                self.assertEqual(f.read(), "frame %d" % frame)
+
+        self.assertNotIn(threading.current_thread().name, copy_threads)
+
+    def test_copy_sequence_serially(self):
+        """
+        Ensures files are copied on the calling thread without concurrency.
+        """
+        item = self._create_sequence_item(3)
+        self.settings["Copy Concurrency"].value = 1
+
+        copy_threads = set()
+        copy_file = self.hook._copy_file
+
+        def record_copy(*args, **kwargs):
+            copy_threads.add(threading.current_thread().name)
+            return copy_file(*args, **kwargs)
+
+        with patch.object(self.hook, "_copy_file", side_effect=record_copy):
+            self.hook._copy_work_to_publish(self.settings, item)
+
+        for frame in range(1, 4):
+            self.assertTrue(os.path.exists(self._get_publish_file(frame)))
+
+        self.assertEqual(copy_threads, set([threading.current_thread().name]))
+
+    def test_copy_error_is_raised(self):
+        """
+        Ensures a failure to copy one of the files is raised once the other
+        copies are done.
+        """
+        # more files than 4 times the workers, so that a pool would hand them
+        # out in chunks by default
+        nb_frames = 20
+        item = self._create_sequence_item(nb_frames)
+        self.settings["Copy Concurrency"].value = 4
+
+        failing_file = self.work_template.apply_fields({"frame": 3})
+        copy_file = self.hook._copy_file
+
+        def failing_copy(src, dst, **kwargs):
+            if src == failing_file:
+                raise IOError("No space left on device")
+            return copy_file(src, dst, **kwargs)
+
+        with patch.object(self.hook, "_copy_file", side_effect=failing_copy):
+            with self.assertRaisesRegex(
+                Exception,
+                "Failed to copy work file from '%s' to '.+': No space left on device"
+                % re.escape(failing_file),
+            ):
+                self.hook._copy_work_to_publish(self.settings, item)
+
+        for frame in range(1, nb_frames + 1):
+            if frame == 3:
+                continue
+            self.assertTrue(os.path.exists(self._get_publish_file(frame)))
+        self.assertFalse(os.path.exists(self._get_publish_file(3)))
+
+    def test_mismatched_file_publishes_in_place(self):
+        """
+        Ensures nothing is copied if one of the files of a sequence does not
+        match the work template.
+        """
+        item = self._create_sequence_item(4)
+        stray_file = os.path.join(self.work_folder, "render.last.dat")
+        with open(stray_file, "w") as f:
+            f.write("stray")
+        item.properties.sequence_paths.append(stray_file)
+
+        self.hook._copy_work_to_publish(self.settings, item)
+
+        self.assertFalse(os.path.exists(self.publish_folder))
+
+    def test_skip_copy_to_same_file(self):
+        """
+        Ensures files which already are their publish file are not copied.
+        """
+        # publish to the work location, so every work file is its own publish
+        # file.
+        item = self._create_sequence_item(3)
+        item.properties.publish_template = self.work_template
+
+        with patch.object(self.hook, "_copy_file") as copy_file:
+            self.hook._copy_work_to_publish(self.settings, item)
+
+        copy_file.assert_not_called()
+        for frame in range(1, 4):
+            with open(self.work_template.apply_fields({"frame": frame})) as f:
+                self.assertEqual(f.read(), "frame %d" % frame)
+
+    def test_skip_copy_to_linked_file(self):
+        """
+        Ensures files already linked to their publish location, with a path
+        that differs from the work file, are not copied again.
+        """
+        item = self._create_sequence_item(2)
+        os.makedirs(self.publish_folder)
+        for frame in range(1, 3):
+            os.link(
+                self.work_template.apply_fields({"frame": frame}),
+                self._get_publish_file(frame),
+            )
+
+        with patch.object(self.hook, "_copy_file") as copy_file:
+            self.hook._copy_work_to_publish(self.settings, item)
+
+        copy_file.assert_not_called()
+
+    def test_file_type_index_is_reused_for_equal_settings(self):
+        """
+        Ensures the file type index is only rebuilt when the content of the
+        "File Types" setting changes, since settings are copied for each task.
+        """
+        file_types = self.settings["File Types"].value
+        type_index = self.hook._get_file_type_index(file_types)
+
+        self.assertIs(
+            self.hook._get_file_type_index(copy.deepcopy(file_types)), type_index
+        )
+
+        other_file_types = [["Other Image", "png"]] + copy.deepcopy(file_types)
+        other_index = self.hook._get_file_type_index(other_file_types)
+        self.assertEqual(other_index["png"], "Other Image")
+        self.assertIsNot(other_index, type_index)
+
+    def test_invalid_file_types_raise(self):
+        """
+        Ensures malformed "File Types" entries are reported as configuration
+        errors.
+        """
+        for file_types in [
+            [["Folder"]],
+            [["Rendered Image", "exr", 42]],
+            ["Rendered Image"],
+        ]:
+            with self.assertRaisesRegex(sgtk.TankError, "Invalid 'File Types'"):
+                self.hook._get_file_type_index(file_types)
+
+    def test_caches_are_bounded(self):
+        """
+        Ensures the plugin's caches do not grow beyond their maximum size.
+        """
+        with patch.object(self.hook, "CACHE_SIZE", 4):
+            for index in range(10):
+                self.hook._get_work_fields(
+                    self.work_template,
+                    self.work_template.apply_fields({"frame": index}),
+                )
+                self.assertLessEqual(len(self.hook._work_fields_cache), 4)
+
+    def test_publish_template_by_name(self):
+        """
+        Ensures a publish template set by name on an item resolves to the
+        template defined in the pipeline configuration.
+        """
+        item = self._create_sequence_item(1)
+        item.properties.publish_template = "render_publish"
+
+        with patch.dict(
+            self.hook.sgtk.templates, {"render_publish": self.publish_template}
+        ):
+            self.assertIs(
+                self.hook.get_publish_template(self.settings, item),
+                self.publish_template,
+            )
+
+    def test_unknown_template_name_warns_once(self):
+        """
+        Ensures a template name missing from the pipeline configuration is
+        only reported the first time it is resolved.
+        """
+        item = self._create_sequence_item(1)
+        item.properties.publish_template = "unknown_publish"
+
+        with patch.object(
+            type(self.hook), "logger", new_callable=PropertyMock
+        ) as logger:
+            for _ in range(3):
+                self.assertIsNone(self.hook.get_publish_template(self.settings, item))
+
+        logger.return_value.warning.assert_called_once_with(
+            "Template '%s' is not defined in the pipeline configuration.",
+            "unknown_publish",
+        )
+
+    def test_link_image_files_unless_disabled(self):
+        """
+        Ensures image files are linked unless linking is explicitly disabled,
+        while other files are only linked when explicitly allowed.
+        """
+        os.makedirs(self.publish_folder)
+
+        for extension, allow_hardlink, linked in [
+            ("exr", None, True),
+            ("exr", False, False),
+            ("exr", True, True),
+            ("dat", None, False),
+            ("dat", False, False),
+            ("dat", True, True),
+        ]:
+            work_file = os.path.join(self.work_folder, "render.0001.%s" % extension)
+            with open(work_file, "w") as f:
+                f.write("frame 1")
+            publish_file = os.path.join(
+                self.publish_folder, "render_%s.0001.%s" % (allow_hardlink, extension)
+            )
+
+            self.hook._copy_work_file(
+                work_file, publish_file, allow_hardlink=allow_hardlink
+            )
+            self.assertEqual(os.path.samefile(work_file, publish_file), linked)
+
+    def test_copy_file_hardlink(self):
+        """
+        Ensures files are linked to their destination when allowed.
+        """
+        work_file = self._create_work_file(1)
+        publish_file = self._get_publish_file(1)
+
+        self.assertEqual(
+            self.hook._copy_file(work_file, publish_file, allow_hardlink=True),
+            "Linked",
+        )
+        self.assertEqual(os.stat(work_file).st_ino, os.stat(publish_file).st_ino)
+
+    def test_copy_file_without_hardlink(self):
+        """
+        Ensures files copied without linking get their own inode, writable by
+        everyone.
+        """
+        work_file = self._create_work_file(1)
+        publish_file = self._get_publish_file(1)
+
+        self.assertIn(
+            self.hook._copy_file(work_file, publish_file, allow_hardlink=False),
+            ["Cloned", "Copied"],
+        )
+        self.assertNotEqual(os.stat(work_file).st_ino, os.stat(publish_file).st_ino)
+        self.assertEqual(stat.S_IMODE(os.stat(publish_file).st_mode), 0o666)
+        with open(publish_file) as f:
+            self.assertEqual(f.read(), "frame 1")
+
+    @unittest.skipUnless(sgtk.util.is_linux(), "Files are only cloned on Linux.")
+    def test_unsupported_clone_falls_back_to_copy(self):
+        """
+        Ensures a filesystem unable to clone files leaves no destination
+        behind, and is not asked to clone files again.
+        """
+        work_file = self._create_work_file(1)
+        publish_file = self._get_publish_file(1)
+        device = os.stat(work_file).st_dev
+
+        clone_error = OSError(errno.EOPNOTSUPP, os.strerror(errno.EOPNOTSUPP))
+        with patch("fcntl.ioctl", side_effect=clone_error) as ioctl:
+            self.assertFalse(self.hook._clone_file(work_file, publish_file, device))
+            self.assertFalse(os.path.exists(publish_file))
+            self.assertIn(device, self.hook._unclonable_devices)
+
+            self.assertEqual(self.hook._copy_file(work_file, publish_file), "Copied")
+
+        self.assertEqual(ioctl.call_count, 1)
+        with open(publish_file) as f:
+            self.assertEqual(f.read(), "frame 1")
+
+    @unittest.skipUnless(sgtk.util.is_linux(), "Files are only cloned on Linux.")
+    def test_clone_never_truncates_existing_file(self):
+        """
+        Ensures an existing destination is never opened to clone a file into.
+        """
+        work_file = self._create_work_file(1)
+        publish_file = self._get_publish_file(1)
+        with open(publish_file, "w") as f:
+            f.write("existing")
+
+        with patch("fcntl.ioctl") as ioctl:
+            self.assertFalse(
+                self.hook._clone_file(
+                    work_file, publish_file, os.stat(work_file).st_dev
+                )
+            )
+
+        ioctl.assert_not_called()
+        with open(publish_file) as f:
+            self.assertEqual(f.read(), "existing")
+
+    def test_copy_file_fallback(self):
+        """
+        Ensures the toolkit copy is used when copying the contents fails, but
+        not when only setting the permissions of the copy does.
+        """
+        work_file = self._create_work_file(1)
+        publish_file = self._get_publish_file(1)
+        hook_globals = self.hook._copy_file.__func__.__globals__
+
+        with patch.object(self.hook, "_clone_file", return_value=False):
+            with patch.dict(hook_globals, {"copy_file": MagicMock()}):
+                with patch("shutil.copyfile", side_effect=IOError("Copy failed")):
+                    self.assertEqual(
+                        self.hook._copy_file(work_file, publish_file), "Copied"
+                    )
+                hook_globals["copy_file"].assert_called_once_with(
+                    work_file, publish_file
+                )
+
+            with patch.dict(hook_globals, {"copy_file": MagicMock()}):
+                with patch("os.chmod", side_effect=OSError("Chmod failed")):
+                    with self.assertRaisesRegex(OSError, "Chmod failed"):
+                        self.hook._copy_file(work_file, publish_file)
+                hook_globals["copy_file"].assert_not_called()
+
+    def test_publish_path_is_cached(self):
+        """
+        Ensures the publish path is only resolved once per path and
+        templates, and resolved again for different templates.
+        """
+        item = self._create_file_item(1)
+        publish_file = self._get_publish_file(1)
+
+        with patch.object(
+            self.publish_template,
+            "apply_fields",
+            wraps=self.publish_template.apply_fields,
+        ) as apply_fields:
+            for _ in range(2):
+                self.assertEqual(
+                    self.hook.get_publish_path(self.settings, item), publish_file
+                )
+        apply_fields.assert_called_once()
+
+        item.properties.publish_template = FrameTemplate(
+            self.publish_folder, "render_v002"
+        )
+        self.assertEqual(
+            self.hook.get_publish_path(self.settings, item),
+            os.path.join(self.publish_folder, "render_v002.0001.dat"),
+        )
+
+    def test_publish_name_and_version_are_cached(self):
+        """
+        Ensures the path info hook is only asked once per path for the
+        publish name and version.
+        """
+        item = self._create_file_item(1)
+        # without a work template the version comes from the path info hook
+        item.properties.work_template = None
+        path = item.properties.path
+
+        with patch.object(
+            self.app.util, "get_publish_name", return_value="render.dat"
+        ) as get_publish_name, patch.object(
+            self.app.util, "get_version_number", return_value=3
+        ) as get_version_number:
+            for _ in range(2):
+                self.assertEqual(
+                    self.hook.get_publish_name(self.settings, item), "render.dat"
+                )
+                self.assertEqual(self.hook.get_publish_version(self.settings, item), 3)
+
+        get_publish_name.assert_called_once_with(path, sequence=False)
+        get_version_number.assert_called_once_with(path)
+
+    def test_work_fields_are_cached(self):
+        """
+        Ensures fields are only extracted once per work template and path,
+        and extracted again for a different work template.
+        """
+        path = self._create_work_file(1)
+
+        with patch.object(
+            self.work_template, "get_fields", wraps=self.work_template.get_fields
+        ) as get_fields:
+            fields = self.hook._get_work_fields(self.work_template, path)
+            # callers get their own copy of the cached fields
+            fields["frame"] = 2
+            self.assertEqual(
+                self.hook._get_work_fields(self.work_template, path), {"frame": 1}
+            )
+        get_fields.assert_called_once_with(path)
+
+        other_template = FrameTemplate(self.work_folder, "comp")
+        self.assertIsNone(self.hook._get_work_fields(other_template, path))
+
+    def test_path_extension(self):
+        """
+        Ensures the extension of a path matches the one of its path
+        components.
+        """
+        dotted_folder = os.path.join(self.root, "b.c")
+        os.makedirs(dotted_folder)
+
+        for path in [
+            "/a/b.c/d",
+            "/a/b.c/d.ext",
+            "/a/b/d.tar.gz",
+            "/a/.hidden",
+            "/a/b/",
+            "/a/b.c/",
+            "/a/b.",
+            dotted_folder,
+            dotted_folder + os.sep,
+            self.work_folder,
+        ]:
+            self.assertEqual(
+                self.hook._get_path_extension(path),
+                self.app.util.get_file_path_components(path)["extension"],
+                path,
+            )
+
+    def test_reset_caches(self):
+        """
+        Ensures resetting the caches empties every one of them.
+        """
+        item = self._create_file_item(1)
+        self.hook.get_publish_type(self.settings, item)
+        self.hook.get_publish_path(self.settings, item)
+        self.hook.get_publish_name(self.settings, item)
+        self.hook._get_template_by_name("render_publish")
+        item.properties.work_template = None
+        self.hook.get_publish_version(self.settings, item)
+        self.hook._unclonable_devices.add(os.stat(self.root).st_dev)
+
+        caches = [
+            "_publish_name_cache",
+            "_publish_path_cache",
+            "_template_cache",
+            "_version_number_cache",
+            "_work_fields_cache",
+            "_unclonable_devices",
+        ]
+        for cache in caches:
+            self.assertTrue(getattr(self.hook, cache), cache)
+        self.assertIsNotNone(self.hook._file_type_index)
+
+        self.hook.reset_caches()
+
+        for cache in caches:
+            self.assertFalse(getattr(self.hook, cache), cache)
+        self.assertIsNone(self.hook._file_type_index)